@@ -1,62 +1,69 @@
-import json
-import google.generativeai as genai
-from config import GEMINI_API_KEY
+import logging
+import orjson
+from typing_extensions import TypedDict
+from config import MODEL_NAME
+from utils.gemini_stream import collect, json_generation_config
+from utils.llm_cache import cached_call, make_cache_key
 
-async def generate_frontend(enhanced_prompt: dict) -> dict:
+logger = logging.getLogger(__name__)
+
+FrontendFiles = TypedDict("FrontendFiles", {
+    "app/page.tsx": str,
+    "app/layout.tsx": str,
+    "package.json": str
+})
+
+class FrontendCode(TypedDict):
+    project_name: str
+    frontend: FrontendFiles
+
+_GENERATION_CONFIG = json_generation_config(FrontendCode, max_output_tokens=32768)
+
+_PROMPT_TMPL = (
+    "Generate Next.js 14 frontend code. Return ONLY valid JSON.\n\n"
+    "Project: {description}\n"
+    "Features: {features}\n\n"
+    "Return this exact JSON structure:\n"
+    "{{\n"
+    '  "project_name": "{project_name}",\n'
+    '  "frontend": {{\n'
+    '    "app/page.tsx": "code here",\n'
+    '    "app/layout.tsx": "code here",\n'
+    '    "package.json": "code here"\n'
+    '  }}\n'
+    "}}\n\n"
+    "Use shadcn/ui and Tailwind CSS. Return ONLY JSON."
+)
+
+async def generate_frontend(enhanced_prompt: dict, on_delta=None) -> dict:
     try:
-        genai.configure(api_key=GEMINI_API_KEY)
-        model = genai.GenerativeModel("gemini-2.5-flash")
-        
         project_name = enhanced_prompt.get("project_name", "project")
         features = str(enhanced_prompt.get("features", []))
         description = enhanced_prompt.get("enhanced_prompt", "")
         
-        prompt = (
-            "Generate Next.js 14 frontend code. Return ONLY valid JSON.\n\n"
-            "Project: " + description + "\n"
-            "Features: " + features + "\n\n"
-            "Return this exact JSON structure:\n"
-            "{\n"
-            '  "project_name": "' + project_name + '",\n'
-            '  "frontend": {\n'
-            '    "app/page.tsx": "code here",\n'
-            '    "app/layout.tsx": "code here",\n'
-            '    "package.json": "code here"\n'
-            '  }\n'
-            "}\n\n"
-            "Use shadcn/ui and Tailwind CSS. Return ONLY JSON."
+        prompt = _PROMPT_TMPL.format(
+            description=description,
+            features=features,
+            project_name=project_name
         )
 
-        response = model.generate_content(prompt)
-        response_text = response.text.strip()
-        
-        backticks = "```"
-        json_backticks = "```json"
-        
-        if json_backticks in response_text:
-            parts = response_text.split(json_backticks)
-            if len(parts) > 1:
-                response_text = parts[1].split(backticks)[0].strip()
-        elif backticks in response_text:
-            parts = response_text.split(backticks)
-            if len(parts) > 1:
-                response_text = parts[1].split(backticks)[0].strip()
-        
-        start = response_text.find("{")
-        end = response_text.rfind("}") + 1
-        if start != -1 and end > start:
-            response_text = response_text[start:end]
+        cache_key = make_cache_key("frontend", enhanced_prompt)
+        frontend_code, _ = await cached_call(
+            cache_key,
+            lambda: collect(prompt, _GENERATION_CONFIG, on_delta),
+            parse=orjson.loads
+        )
         
-        print("Frontend generated successfully!")
+        logger.info("Frontend generated successfully!")
         
         return {
             "success": True,
-            "frontend_code": response_text,
-            "model": "gemini-2.5-flash"
+            "frontend_code": frontend_code,
+            "model": MODEL_NAME
         }
         
     except Exception as e:
-        print("Frontend Generation Error: " + str(e))
+        logger.error("Frontend Generation Error: %s", e)
         return {
             "success": False,
             "error": "Frontend generation failed",
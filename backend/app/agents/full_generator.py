@@ -0,0 +1,101 @@
+import logging
+import orjson
+from typing_extensions import TypedDict
+from config import MODEL_NAME
+from utils.gemini_stream import collect, TruncatedResponseError, json_generation_config
+from agents.prompt_enhancer import EnhancedPrompt
+from agents.frontend_generator import FrontendFiles
+from agents.backend_generator import BackendFiles
+from utils.llm_cache import cached_call, make_cache_key
+
+logger = logging.getLogger(__name__)
+
+class FullProject(TypedDict):
+    enhanced_prompt: EnhancedPrompt
+    frontend: FrontendFiles
+    backend: BackendFiles
+
+_GENERATION_CONFIG = json_generation_config(FullProject, max_output_tokens=49152)
+
+_PROMPT_TMPL = (
+    "You are a full-stack project generator. Return ONLY valid JSON, no other text.\n\n"
+    "User Request: {user_prompt}\n\n"
+    "First expand the request into a project spec, then generate a Next.js 14 "
+    "frontend (shadcn/ui and Tailwind CSS) and an Express.js backend "
+    "(PostgreSQL on Neon DB) for that spec.\n\n"
+    "Return this exact JSON structure:\n"
+    "{{\n"
+    '  "enhanced_prompt": {{\n'
+    '    "project_name": "kebab-case-name",\n'
+    '    "enhanced_prompt": "detailed description",\n'
+    '    "features": ["feature1", "feature2"],\n'
+    '    "tech_stack": {{\n'
+    '      "frontend": ["Next.js 14", "Tailwind CSS", "shadcn/ui"],\n'
+    '      "backend": ["Node.js", "Express", "PostgreSQL"],\n'
+    '      "database": "Neon PostgreSQL"\n'
+    '    }},\n'
+    '    "pages": ["page1", "page2"],\n'
+    '    "components": ["component1", "component2"]\n'
+    '  }},\n'
+    '  "frontend": {{\n'
+    '    "app/page.tsx": "code here",\n'
+    '    "app/layout.tsx": "code here",\n'
+    '    "package.json": "code here"\n'
+    '  }},\n'
+    '  "backend": {{\n'
+    '    "server.js": "code here",\n'
+    '    "package.json": "code here"\n'
+    '  }}\n'
+    "}}"
+)
+
+async def generate_all(user_prompt: str, on_delta=None) -> dict:
+    """
+    Generate the project spec, frontend and backend in a single Gemini call
+    """
+    try:
+        prompt = _PROMPT_TMPL.format(user_prompt=user_prompt)
+        
+        cache_key = make_cache_key("full_generator", user_prompt)
+        project_data, from_cache = await cached_call(
+            cache_key,
+            lambda: collect(prompt, _GENERATION_CONFIG, on_delta),
+            parse=orjson.loads
+        )
+        
+        enhanced_prompt = project_data["enhanced_prompt"]
+        project_name = enhanced_prompt.get("project_name", "project")
+        logger.info("Project generated with a single Gemini call!")
+        
+        return {
+            "success": True,
+            "enhanced_prompt": enhanced_prompt,
+            "frontend_code": {
+                "project_name": project_name,
+                "frontend": project_data["frontend"]
+            },
+            "backend_code": {
+                "project_name": project_name,
+                "backend": project_data["backend"]
+            },
+            "model": MODEL_NAME,
+            "from_cache": from_cache
+        }
+        
+    except (TruncatedResponseError, orjson.JSONDecodeError) as e:
+        # Too much output for one call; the caller can retry with separate agents
+        logger.warning("Full Generation Truncated: %s", e)
+        return {
+            "success": False,
+            "error": "Full generation truncated",
+            "details": str(e),
+            "fallback": True
+        }
+        
+    except Exception as e:
+        logger.error("Full Generation Error: %s", e)
+        return {
+            "success": False,
+            "error": "Full generation failed",
+            "details": str(e)
+        }
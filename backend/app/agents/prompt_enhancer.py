@@ -1,63 +1,67 @@
-import json
-import google.generativeai as genai
-from config import GEMINI_API_KEY
+import logging
+import orjson
+from typing_extensions import TypedDict
+from config import MODEL_NAME
+from utils.gemini_stream import collect, json_generation_config
+from utils.llm_cache import cached_call, make_cache_key
 
-async def enhance_prompt(user_prompt: str) -> dict:
+logger = logging.getLogger(__name__)
+
+class TechStack(TypedDict):
+    frontend: list[str]
+    backend: list[str]
+    database: str
+
+class EnhancedPrompt(TypedDict):
+    project_name: str
+    enhanced_prompt: str
+    features: list[str]
+    tech_stack: TechStack
+    pages: list[str]
+    components: list[str]
+
+_GENERATION_CONFIG = json_generation_config(EnhancedPrompt, max_output_tokens=16384)
+
+_PROMPT_TMPL = (
+    "You are a prompt enhancement expert. Return ONLY valid JSON, no other text.\n\n"
+    "User Request: {user_prompt}\n\n"
+    "Return this exact JSON structure:\n"
+    "{{\n"
+    '  "project_name": "kebab-case-name",\n'
+    '  "enhanced_prompt": "detailed description",\n'
+    '  "features": ["feature1", "feature2"],\n'
+    '  "tech_stack": {{\n'
+    '    "frontend": ["Next.js 14", "Tailwind CSS", "shadcn/ui"],\n'
+    '    "backend": ["Node.js", "Express", "PostgreSQL"],\n'
+    '    "database": "Neon PostgreSQL"\n'
+    '  }},\n'
+    '  "pages": ["page1", "page2"],\n'
+    '  "components": ["component1", "component2"]\n'
+    "}}"
+)
+
+async def enhance_prompt(user_prompt: str, on_delta=None) -> dict:
     try:
-        print("Gemini API Key loaded for prompt enhancer")
+        prompt = _PROMPT_TMPL.format(user_prompt=user_prompt)
         
-        genai.configure(api_key=GEMINI_API_KEY)
-        model = genai.GenerativeModel("gemini-2.5-flash")
-        
-        prompt = (
-            "You are a prompt enhancement expert. Return ONLY valid JSON, no other text.\n\n"
-            "User Request: " + user_prompt + "\n\n"
-            "Return this exact JSON structure:\n"
-            "{\n"
-            '  "project_name": "kebab-case-name",\n'
-            '  "enhanced_prompt": "detailed description",\n'
-            '  "features": ["feature1", "feature2"],\n'
-            '  "tech_stack": {\n'
-            '    "frontend": ["Next.js 14", "Tailwind CSS", "shadcn/ui"],\n'
-            '    "backend": ["Node.js", "Express", "PostgreSQL"],\n'
-            '    "database": "Neon PostgreSQL"\n'
-            '  },\n'
-            '  "pages": ["page1", "page2"],\n'
-            '  "components": ["component1", "component2"]\n'
-            "}"
+        cache_key = make_cache_key("prompt_enhancer", user_prompt)
+        enhanced_data, from_cache = await cached_call(
+            cache_key,
+            lambda: collect(prompt, _GENERATION_CONFIG, on_delta),
+            parse=orjson.loads
         )
         
-        response = model.generate_content(prompt)
-        response_text = response.text.strip()
-        
-        backticks = "```"
-        json_backticks = "```json"
-        
-        if json_backticks in response_text:
-            parts = response_text.split(json_backticks)
-            if len(parts) > 1:
-                response_text = parts[1].split(backticks)[0].strip()
-        elif backticks in response_text:
-            parts = response_text.split(backticks)
-            if len(parts) > 1:
-                response_text = parts[1].split(backticks)[0].strip()
-        
-        start = response_text.find("{")
-        end = response_text.rfind("}") + 1
-        if start != -1 and end > start:
-            response_text = response_text[start:end]
-        
-        enhanced_data = json.loads(response_text)
-        print("Prompt enhanced with Gemini!")
+        logger.info("Prompt enhanced with Gemini!")
         
         return {
             "success": True,
             "enhanced_prompt": enhanced_data,
-            "model": "gemini-2.5-flash"
+            "model": MODEL_NAME,
+            "from_cache": from_cache
         }
         
     except Exception as e:
-        print("Prompt Enhancement Error: " + str(e))
+        logger.error("Prompt Enhancement Error: %s", e)
         return {
             "success": False,
             "error": "Prompt enhancement failed",
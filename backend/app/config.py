@@ -1,5 +1,9 @@
+import logging
 import os
 from dotenv import load_dotenv
+import google.generativeai as genai
+
+logger = logging.getLogger(__name__)
 
 load_dotenv()
 
@@ -7,4 +11,21 @@ PORT = int(os.getenv("PORT", 8001))
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
 if not GEMINI_API_KEY:
-    print("⚠️  Warning: GEMINI_API_KEY not found in .env")
+    logger.warning("⚠️  Warning: GEMINI_API_KEY not found in .env")
+
+# Configure the SDK once and share a single model across all agents
+MODEL_NAME = "gemini-2.5-flash"
+genai.configure(api_key=GEMINI_API_KEY)
+MODEL = genai.GenerativeModel(MODEL_NAME)
+
+# Cache Gemini results by prompt hash (useful when re-running the same prompt in dev)
+LLM_CACHE = os.getenv("LLM_CACHE", "0") == "1"
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", "./.llm_cache")
+
+# Serve prompt enhancements for near-duplicate prompts from an embedding index
+SEMANTIC_CACHE = os.getenv("SEMANTIC_CACHE", "0") == "1"
+SEMANTIC_CACHE_DIR = os.getenv("SEMANTIC_CACHE_DIR", "./.semantic_cache")
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.92))
+
+# Auto-reload in development; set RELOAD=0 in production to run one worker per CPU
+RELOAD = os.getenv("RELOAD", "1") == "1"
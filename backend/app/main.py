@@ -1,16 +1,54 @@
+import logging
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
+from zipstream import ZipStream, ZIP_DEFLATED
 from pathlib import Path
-from config import PORT
-from master_agent import orchestrate_generation
-import json
+import os
+from contextlib import asynccontextmanager
+from config import PORT, RELOAD, GEMINI_API_KEY, MODEL, SEMANTIC_CACHE
+from master_agent import orchestrate_stream
+from utils.file_writer import PROJECT_NAME_RE
+from utils.semantic_cache import semantic_cache
+import asyncio
+
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    format="%(asctime)s %(name)s %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Open the Gemini channel before the first request so /generate
+    doesn't pay the connection setup cost, and load/persist the
+    semantic cache around the app's lifetime
+    """
+    if SEMANTIC_CACHE:
+        try:
+            await asyncio.to_thread(semantic_cache.load)
+        except Exception as e:
+            logger.warning("⚠️  Semantic cache disabled: %s", e)
+    
+    if GEMINI_API_KEY:
+        try:
+            await MODEL.count_tokens_async("ping")
+            logger.info("🔥 Gemini client warmed up")
+        except Exception as e:
+            logger.warning("⚠️  Gemini warm-up failed: %s", e)
+    yield
+    
+    if semantic_cache.enabled:
+        semantic_cache.save()
 
 app = FastAPI(
     title="MultiAgent AI Website Generator",
     description="Generate full-stack web applications using AI agents",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -21,6 +59,73 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+GENERATED_DIR = Path("generated")
+
+# Preview limits: at most MAX_FILES files, each truncated to MAX_BYTES
+MAX_FILES = 10
+MAX_BYTES = 64 * 1024
+PREVIEW_SUFFIXES = frozenset({'.tsx', '.ts', '.jsx', '.js', '.css'})
+
+def _walk_files(base_path: Path):
+    """
+    Yield paths of regular files under base_path, skipping symlinks so
+    nothing outside the project directory is ever read
+    """
+    for root, _, files in os.walk(base_path):
+        for name in files:
+            file_path = os.path.join(root, name)
+            if not os.path.islink(file_path):
+                yield file_path
+
+def _iter_preview_files(frontend_path: Path):
+    """
+    Yield (path, ext) for previewable source files under frontend_path
+    """
+    for file_path in _walk_files(frontend_path):
+        ext = os.path.splitext(file_path)[1]
+        if ext in PREVIEW_SUFFIXES:
+            yield file_path, ext
+
+def _collect_preview(frontend_path: Path, include_total: bool):
+    """
+    Read up to MAX_FILES frontend files for preview
+    """
+    frontend_files = []
+    total_files = None
+    
+    if frontend_path.exists():
+        for file_path, ext in _iter_preview_files(frontend_path):
+            if len(frontend_files) >= MAX_FILES:
+                break
+            if os.stat(file_path).st_size > MAX_BYTES * 4:
+                continue
+            with open(file_path, 'rb') as f:
+                content = f.read(MAX_BYTES).decode('utf-8', errors='replace')
+            frontend_files.append({
+                "path": os.path.relpath(file_path, frontend_path),
+                "content": content,
+                "type": ext[1:]
+            })
+        
+        if include_total:
+            total_files = sum(1 for _ in _iter_preview_files(frontend_path))
+    
+    return frontend_files, total_files
+
+def _resolve_project(project_name: str) -> Path:
+    """
+    Map a project name from the URL to its directory under generated/,
+    rejecting names that could escape it
+    """
+    if not PROJECT_NAME_RE.fullmatch(project_name):
+        raise HTTPException(status_code=400, detail="Invalid project name")
+    
+    resolved = (GENERATED_DIR / project_name).resolve()
+    if not resolved.is_relative_to(GENERATED_DIR.resolve()):
+        raise HTTPException(status_code=400, detail="Invalid project name")
+    
+    return resolved
+
 class PromptRequest(BaseModel):
     prompt: str
 
@@ -42,6 +147,7 @@ def health():
     return {
         "status": "healthy",
         "agents": {
+            "full_generator": "Gemini",
             "prompt_enhancer": "DeepSeek",
             "frontend_generator": "Gemini",
             "backend_generator": "Gemini"
@@ -52,6 +158,9 @@ def health():
 async def generate_website(request: PromptRequest):
     """
     Main endpoint: Generate complete full-stack application
+    
+    Streams NDJSON events ({"stage": ..., "delta": ...}) while the agents
+    generate, followed by a final "done" or "error" event.
     """
     if not request.prompt or len(request.prompt.strip()) < 10:
         raise HTTPException(
@@ -59,53 +168,34 @@ async def generate_website(request: PromptRequest):
             detail="Prompt must be at least 10 characters long"
         )
     
-    print(f"📝 Received prompt: {request.prompt}")
+    logger.info("📝 Received prompt: %s", request.prompt)
     
-    result = await orchestrate_generation(request.prompt)
-    
-    if not result["success"]:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Generation failed: {result.get('error')} - {result.get('details')}"
-        )
-    
-    return {
-        "status": "success",
-        "message": "Website generated successfully!",
-        "data": result
-    }
+    return StreamingResponse(
+        orchestrate_stream(request.prompt),
+        media_type="application/x-ndjson"
+    )
 
 @app.get("/preview/{project_name}")
-async def preview_project(project_name: str):
+async def preview_project(project_name: str, include_total: bool = False):
     """
     Get generated project structure for preview
     """
-    project_path = Path("generated") / project_name
+    project_path = _resolve_project(project_name)
     
     if not project_path.exists():
         raise HTTPException(status_code=404, detail="Project not found")
     
     try:
-        # Read frontend files for preview
-        frontend_files = []
-        frontend_path = project_path / "frontend"
-        
-        if frontend_path.exists():
-            for file_path in frontend_path.rglob('*'):
-                if file_path.is_file() and file_path.suffix in ['.tsx', '.ts', '.jsx', '.js', '.css']:
-                    rel_path = file_path.relative_to(frontend_path)
-                    content = file_path.read_text(encoding='utf-8')
-                    frontend_files.append({
-                        "path": str(rel_path),
-                        "content": content,
-                        "type": file_path.suffix[1:]
-                    })
+        # Walk and read files off the event loop
+        frontend_files, total_files = await asyncio.to_thread(
+            _collect_preview, project_path / "frontend", include_total
+        )
         
         return {
             "status": "success",
             "project_name": project_name,
-            "frontend_files": frontend_files[:10],  # Limit to 10 files for preview
-            "total_files": len(frontend_files)
+            "frontend_files": frontend_files,
+            "total_files": total_files
         }
         
     except Exception as e:
@@ -114,19 +204,33 @@ async def preview_project(project_name: str):
 @app.get("/download/{project_name}")
 async def download_project(project_name: str):
     """
-    Download complete project as ZIP
+    Download complete project as ZIP, streamed from the generated files
     """
-    zip_path = Path("generated") / f"{project_name}.zip"
+    project_path = _resolve_project(project_name)
+    
+    if not project_path.is_dir():
+        raise HTTPException(status_code=404, detail="Project not found")
     
-    if not zip_path.exists():
-        raise HTTPException(status_code=404, detail="ZIP file not found")
+    zip_stream = ZipStream(compress_type=ZIP_DEFLATED)
+    for file_path in _walk_files(project_path):
+        arcname = os.path.join(project_name, os.path.relpath(file_path, project_path))
+        zip_stream.add_path(file_path, arcname)
     
-    return FileResponse(
-        path=str(zip_path),
+    return StreamingResponse(
+        zip_stream,
         media_type="application/zip",
-        filename=f"{project_name}.zip"
+        headers={"Content-Disposition": f'attachment; filename="{project_name}.zip"'}
     )
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=PORT, reload=True)
+    # loop/http "auto" pick uvloop and httptools when installed (uvicorn[standard]
+    # on Linux/macOS) and fall back to asyncio/h11 elsewhere, e.g. Windows
+    run_kwargs = {"host": "0.0.0.0", "port": PORT, "loop": "auto", "http": "auto"}
+    if RELOAD:
+        run_kwargs["reload"] = True
+    else:
+        if SEMANTIC_CACHE:
+            logger.warning("⚠️  Semantic cache is per-worker; entries from all but the last worker to exit are lost")
+        run_kwargs["workers"] = os.cpu_count()
+    uvicorn.run("main:app", **run_kwargs)
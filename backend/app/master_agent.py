@@ -1,88 +1,191 @@
-import json
+import logging
+import asyncio
+import orjson
+from agents.full_generator import generate_all
 from agents.prompt_enhancer import enhance_prompt
 from agents.frontend_generator import generate_frontend
 from agents.backend_generator import generate_backend
-from utils.file_writer import write_generated_code, create_zip_file
+from utils.file_writer import write_generated_code, slugify_project_name, unique_project_name
+from utils.semantic_cache import semantic_cache
 
-async def orchestrate_generation(user_prompt: str) -> dict:
+logger = logging.getLogger(__name__)
+
+def _stage_emitter(on_event, stage: str):
+    if on_event is None:
+        return None
+    
+    async def on_delta(delta: str):
+        await on_event({"stage": stage, "delta": delta})
+    
+    return on_delta
+
+async def _generate_code(enhanced_prompt: dict, on_event=None) -> dict:
+    """
+    Generate frontend and backend for an existing spec with separate agents
+    """
+    # Step 2 & 3: Generate frontend and backend with Gemini in parallel
+    logger.info("🎨 Step 2: Generating frontend with Gemini...")
+    logger.info("⚙️ Step 3: Generating backend with Gemini...")
+    frontend_result, backend_result = await asyncio.gather(
+        generate_frontend(enhanced_prompt, _stage_emitter(on_event, "frontend")),
+        generate_backend(enhanced_prompt, _stage_emitter(on_event, "backend")),
+        return_exceptions=True
+    )
+    
+    for stage, result in (("Frontend", frontend_result), ("Backend", backend_result)):
+        if isinstance(result, BaseException):
+            logger.error("❌ %s generation failed: %s", stage, result)
+            return {
+                "success": False,
+                "error": f"{stage} generation failed",
+                "details": str(result)
+            }
+        if not result.get("success"):
+            logger.error("❌ %s generation failed: %s", stage, result.get('error'))
+            return result
+    
+    logger.info("✅ Frontend generated successfully!")
+    logger.info("✅ Backend generated successfully!")
+    
+    return {
+        "success": True,
+        "enhanced_prompt": enhanced_prompt,
+        "frontend_code": frontend_result.get("frontend_code"),
+        "backend_code": backend_result.get("backend_code"),
+        "agents_used": {
+            "frontend_generator": frontend_result.get("model"),
+            "backend_generator": backend_result.get("model")
+        }
+    }
+
+async def _generate_with_agents(user_prompt: str, on_event=None) -> dict:
+    """
+    Fallback path: enhance the prompt, then generate frontend and backend
+    with separate agents
+    """
+    # Step 1: Enhance prompt with Gemini
+    logger.info("📝 Step 1: Enhancing prompt with gemini...")
+    enhanced_result = await enhance_prompt(user_prompt, _stage_emitter(on_event, "enhance"))
+    
+    if not enhanced_result.get("success"):
+        logger.error("❌ Prompt enhancement failed: %s", enhanced_result.get('error'))
+        return enhanced_result
+    
+    logger.info("✅ Prompt enhanced successfully!")
+    
+    generated = await _generate_code(enhanced_result.get("enhanced_prompt"), on_event)
+    if generated.get("success"):
+        generated["agents_used"]["prompt_enhancer"] = enhanced_result.get("model")
+        generated["from_cache"] = enhanced_result.get("from_cache")
+    return generated
+
+async def orchestrate_generation(user_prompt: str, on_event=None) -> dict:
     """
     Master orchestrator that coordinates all agents
     """
     try:
-        print("🚀 Starting orchestration...")
-        
-        # Step 1: Enhance prompt with Gemini
-        print("📝 Step 1: Enhancing prompt with gemini...")
-        enhanced_result = await enhance_prompt(user_prompt)
-        
-        if not enhanced_result.get("success"):
-            print(f"❌ Prompt enhancement failed: {enhanced_result.get('error')}")
-            return enhanced_result
-        
-        print("✅ Prompt enhanced successfully!")
-        enhanced_prompt = enhanced_result.get("enhanced_prompt")
-        project_name = enhanced_prompt.get("project_name", "generated-project")
-        print(f"📦 Project name: {project_name}")
-        
-        # Step 2: Generate frontend with Gemini
-        print("🎨 Step 2: Generating frontend with Gemini...")
-        frontend_result = await generate_frontend(enhanced_prompt)
-        
-        if not frontend_result.get("success"):
-            print(f"❌ Frontend generation failed: {frontend_result.get('error')}")
-            return frontend_result
-        
-        print("✅ Frontend generated successfully!")
-        
-        # Step 3: Generate backend with Gemini
-        print("⚙️ Step 3: Generating backend with Gemini...")
-        backend_result = await generate_backend(enhanced_prompt)
-        
-        if not backend_result.get("success"):
-            print(f"❌ Backend generation failed: {backend_result.get('error')}")
-            return backend_result
-        
-        print("✅ Backend generated successfully!")
+        logger.info("🚀 Starting orchestration...")
+        
+        embedding, cached_spec = None, None
+        if semantic_cache.enabled:
+            embedding, cached_spec = await asyncio.to_thread(semantic_cache.lookup, user_prompt)
+        
+        if cached_spec is not None:
+            # A similar prompt was enhanced before: reuse its spec, only generate code
+            logger.info("🧠 Step 1: Reusing enhanced prompt from semantic cache...")
+            generated = await _generate_code(cached_spec, on_event)
+            if generated.get("success"):
+                generated["agents_used"]["prompt_enhancer"] = "semantic-cache"
+                # The cached spec names an earlier run's directory; give this run its own
+                generated["enhanced_prompt"] = {
+                    **cached_spec,
+                    "project_name": unique_project_name(cached_spec.get("project_name", "generated-project"))
+                }
+        else:
+            # Steps 1-3: Generate spec, frontend and backend in one Gemini call
+            logger.info("⚡ Steps 1-3: Generating project with a single Gemini call...")
+            generated = await generate_all(user_prompt, _stage_emitter(on_event, "all"))
+            
+            if generated.get("success"):
+                generated["agents_used"] = {"full_generator": generated.get("model")}
+            elif generated.get("fallback"):
+                # Output didn't fit in one call; discard the "all" stream and split it up
+                logger.warning("⚠️  Batched generation truncated, falling back to individual agents: %s", generated.get('details'))
+                if on_event is not None:
+                    await on_event({"stage": "fallback", "reason": generated.get("details")})
+                generated = await _generate_with_agents(user_prompt, on_event)
+            
+            # Skip specs replayed from the LLM cache so repeated prompts don't add duplicates
+            if generated.get("success") and embedding is not None and not generated.get("from_cache"):
+                semantic_cache.add(embedding, generated["enhanced_prompt"])
+        
+        if not generated.get("success"):
+            return generated
+        
+        enhanced_prompt = generated.get("enhanced_prompt")
+        # The name comes from the LLM; make it safe to use as a path and URL segment
+        project_name = slugify_project_name(enhanced_prompt.get("project_name", "generated-project"))
+        logger.info("📦 Project name: %s", project_name)
         
         # Step 4: Write files
-        print("💾 Step 4: Writing files to disk...")
+        logger.info("💾 Step 4: Writing files to disk...")
         
-        write_result = write_generated_code(
-            frontend_code=frontend_result.get("frontend_code"),
-            backend_code=backend_result.get("backend_code"),
+        write_result = await write_generated_code(
+            frontend_code=generated.get("frontend_code"),
+            backend_code=generated.get("backend_code"),
             project_name=project_name
         )
         
         if not write_result.get("success"):
-            print(f"❌ File writing failed: {write_result.get('error')}")
+            logger.error("❌ File writing failed: %s", write_result.get('error'))
             return write_result
         
-        print("✅ Files written successfully!")
-        
-        # Step 5: Create ZIP
-        print("📦 Step 5: Creating ZIP file...")
-        zip_path = create_zip_file(project_name)
-        print(f"✅ ZIP created: {zip_path}")
+        logger.info("✅ Files written successfully!")
         
-        print("🎉 Orchestration complete!")
+        logger.info("🎉 Orchestration complete!")
         
         return {
             "success": True,
             "project_name": project_name,
             "enhanced_prompt": enhanced_prompt,
             "files_path": write_result.get("path"),
-            "zip_path": str(zip_path),
-            "agents_used": {
-                "prompt_enhancer": enhanced_result.get("model"),
-                "frontend_generator": frontend_result.get("model"),
-                "backend_generator": backend_result.get("model")
-            }
+            "download_url": f"/download/{project_name}",
+            "agents_used": generated.get("agents_used")
         }
         
     except Exception as e:
-        print(f"❌ Orchestration failed: {str(e)}")
+        logger.error("❌ Orchestration failed: %s", e)
         return {
             "success": False,
             "error": "Orchestration failed",
             "details": str(e)
         }
+
+async def orchestrate_stream(user_prompt: str):
+    """
+    Run the orchestrator and yield NDJSON events as Gemini streams tokens
+    """
+    queue = asyncio.Queue()
+    task = asyncio.create_task(orchestrate_generation(user_prompt, on_event=queue.put))
+    task.add_done_callback(lambda _: queue.put_nowait(None))
+    
+    try:
+        while True:
+            event = await queue.get()
+            if event is None:
+                break
+            yield orjson.dumps(event) + b"\n"
+        
+        result = task.result()
+        if result.get("success"):
+            final_event = {"stage": "done", "data": result}
+        else:
+            final_event = {
+                "stage": "error",
+                "error": result.get("error"),
+                "details": result.get("details")
+            }
+        yield orjson.dumps(final_event) + b"\n"
+    finally:
+        if not task.done():
+            task.cancel()
@@ -1 +1,4 @@
-from .file_writer import write_generated_code, create_zip_file 
+from .file_writer import write_generated_code, slugify_project_name, unique_project_name, PROJECT_NAME_RE
+from .llm_cache import cached_call, make_cache_key
+from .semantic_cache import semantic_cache
+from .gemini_stream import collect, json_generation_config, TruncatedResponseError
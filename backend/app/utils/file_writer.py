@@ -1,22 +1,44 @@
-import json
+import asyncio
+import logging
+import re
+import secrets
+import aiofiles
 from pathlib import Path
-import zipfile
-import os
 
-def write_generated_code(frontend_code: str, backend_code: str, project_name: str) -> dict:
+logger = logging.getLogger(__name__)
+
+# Project names double as directory names under generated/ and URL segments
+PROJECT_NAME_RE = re.compile(r"[a-z0-9-]{1,64}")
+_INVALID_NAME_CHARS = re.compile(r"[^a-z0-9-]+")
+
+def slugify_project_name(name: str, default: str = "generated-project") -> str:
+    """
+    Turn an LLM-chosen project name into one matching PROJECT_NAME_RE
+    """
+    slug = _INVALID_NAME_CHARS.sub("-", str(name).lower()).strip("-")
+    slug = slug[:64].rstrip("-")
+    return slug if PROJECT_NAME_RE.fullmatch(slug) else default
+
+def unique_project_name(name: str) -> str:
+    """
+    Slugify name and add a random suffix, so runs that share a cached spec
+    never write into the same directory
+    """
+    slug = slugify_project_name(name)[:57].rstrip("-")
+    return f"{slug}-{secrets.token_hex(3)}"
+
+async def write_generated_code(frontend_code: dict, backend_code: dict, project_name: str) -> dict:
     try:
         base_path = Path("generated") / project_name
         base_path.mkdir(parents=True, exist_ok=True)
-        frontend_data = json.loads(frontend_code)
-        frontend_files = frontend_data.get("frontend", {})
-        backend_data = json.loads(backend_code)
-        backend_files = backend_data.get("backend", {})
+        frontend_files = frontend_code.get("frontend", {})
+        backend_files = backend_code.get("backend", {})
         frontend_path = base_path / "frontend"
         frontend_path.mkdir(exist_ok=True)
-        _write_files(frontend_path, frontend_files)
+        files = _collect_files(frontend_path, frontend_files)
         backend_path = base_path / "backend"
         backend_path.mkdir(exist_ok=True)
-        _write_files(backend_path, backend_files)
+        files.update(_collect_files(backend_path, backend_files))
         readme_content = f"""# {project_name}
 
 Generated by MultiAgent AI Website Generator
@@ -41,32 +63,31 @@ cd backend
 npm install
 npm start
 """
-        (base_path / "README.md").write_text(readme_content)
+        files[base_path / "README.md"] = readme_content
+        await asyncio.gather(*[_write_one(path, content) for path, content in files.items()])
         return {"success": True, "path": str(base_path), "files_created": True}
     except Exception as e:
-        print(f"❌ File writing error: {str(e)}")
+        logger.error("❌ File writing error: %s", e)
         return {"success": False, "error": "File writing failed", "details": str(e)}
 
-def _write_files(base_path: Path, files_dict: dict, current_path: Path = None):
+def _collect_files(base_path: Path, files_dict: dict, current_path: Path = None) -> dict:
+    """
+    Create the directory tree for files_dict and return a flat {path: content} map
+    """
     if current_path is None:
         current_path = base_path
+    files = {}
     for name, content in files_dict.items():
         if isinstance(content, dict):
             new_path = current_path / name
             new_path.mkdir(exist_ok=True)
-            _write_files(base_path, content, new_path)
+            files.update(_collect_files(base_path, content, new_path))
         else:
             file_path = current_path / name
             file_path.parent.mkdir(parents=True, exist_ok=True)
-            file_path.write_text(str(content))
+            files[file_path] = str(content)
+    return files
 
-def create_zip_file(project_name: str) -> Path:
-    base_path = Path("generated") / project_name
-    zip_path = Path("generated") / f"{project_name}.zip"
-    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for root, dirs, files in os.walk(base_path):
-            for file in files:
-                file_path = Path(root) / file
-                arcname = file_path.relative_to(base_path.parent)
-                zipf.write(file_path, arcname)
-    return zip_path
+async def _write_one(path: Path, content: str):
+    async with aiofiles.open(path, 'w') as f:
+        await f.write(content)
@@ -0,0 +1,50 @@
+import google.generativeai as genai
+from config import MODEL
+
+_MAX_TOKENS = genai.protos.Candidate.FinishReason.MAX_TOKENS
+
+def json_generation_config(schema, max_output_tokens: int) -> dict:
+    """
+    Generation config for Gemini's native JSON mode constrained to schema.
+    Gemini 2.5 thinking tokens count against max_output_tokens, so limits
+    must leave room for thinking on top of the JSON itself.
+    """
+    return {
+        "response_mime_type": "application/json",
+        "response_schema": schema,
+        "max_output_tokens": max_output_tokens
+    }
+
+class TruncatedResponseError(Exception):
+    """
+    Raised when Gemini stops because it hit max_output_tokens
+    """
+
+async def collect(prompt: str, generation_config: dict, on_delta=None) -> str:
+    """
+    Stream a Gemini response, forwarding each text delta to on_delta,
+    and return the full response text.
+    Raises TruncatedResponseError if the output was cut off.
+    """
+    response = await MODEL.generate_content_async(
+        prompt,
+        generation_config=generation_config,
+        stream=True
+    )
+    parts = []
+    async for chunk in response:
+        # The final chunk may carry only finish metadata and no text
+        try:
+            delta = chunk.text
+        except ValueError:
+            continue
+        if not delta:
+            continue
+        parts.append(delta)
+        if on_delta is not None:
+            await on_delta(delta)
+    
+    candidates = response.candidates
+    if candidates and candidates[0].finish_reason == _MAX_TOKENS:
+        raise TruncatedResponseError("Gemini response hit max_output_tokens")
+    return "".join(parts).strip()
@@ -0,0 +1,63 @@
+import asyncio
+import hashlib
+import orjson
+from config import LLM_CACHE, LLM_CACHE_DIR
+
+# Bump when the stored value format changes so stale entries are never read
+_CACHE_VERSION = 2
+
+# In-process LRU of hot keys so repeated hits skip the disk lookup
+_memory_cache = {}
+_MEMORY_CACHE_SIZE = 128
+_disk_cache = None
+
+def make_cache_key(agent: str, inputs) -> str:
+    payload = orjson.dumps(
+        {"version": _CACHE_VERSION, "agent": agent, "inputs": inputs},
+        option=orjson.OPT_SORT_KEYS
+    )
+    return hashlib.sha256(payload).hexdigest()
+
+def _get_disk_cache():
+    global _disk_cache
+    if _disk_cache is None:
+        import diskcache
+        _disk_cache = diskcache.Cache(LLM_CACHE_DIR)
+    return _disk_cache
+
+def _remember(key: str, value):
+    _memory_cache.pop(key, None)
+    if len(_memory_cache) >= _MEMORY_CACHE_SIZE:
+        _memory_cache.pop(next(iter(_memory_cache)))
+    _memory_cache[key] = value
+
+async def cached_call(key: str, coro_factory, parse=None):
+    """
+    Return (value, hit): the cached result for key, or the result of
+    awaiting coro_factory(), which is then cached. hit is True only when
+    the value came from the cache.
+    parse is applied to a fresh result before it is stored, so a response
+    that fails to parse raises here and is never cached.
+    Caching is skipped entirely unless LLM_CACHE=1.
+    """
+    if not LLM_CACHE:
+        value = await coro_factory()
+        return (parse(value) if parse else value), False
+    
+    if key in _memory_cache:
+        # Move to the end so hot keys survive eviction
+        value = _memory_cache.pop(key)
+        _memory_cache[key] = value
+        return value, True
+    
+    disk_cache = _get_disk_cache()
+    value = await asyncio.to_thread(disk_cache.get, key)
+    hit = value is not None
+    if not hit:
+        value = await coro_factory()
+        if parse:
+            value = parse(value)
+        await asyncio.to_thread(disk_cache.set, key, value)
+    
+    _remember(key, value)
+    return value, hit
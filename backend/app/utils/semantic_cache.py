@@ -0,0 +1,89 @@
+import logging
+import threading
+from pathlib import Path
+import orjson
+from config import SEMANTIC_CACHE_DIR, SEMANTIC_CACHE_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+class SemanticCache:
+    """
+    Cache keyed by prompt embedding: a lookup hits when a previously stored
+    prompt has cosine similarity above the threshold.
+    fastembed, faiss and numpy are only imported when the cache is loaded.
+    
+    The index lives in process memory and save() overwrites the files on
+    disk, so it is single-worker only: with several uvicorn workers each
+    keeps its own index and the last one to shut down wins.
+    """
+
+    def __init__(self, cache_dir: str, threshold: float):
+        self.cache_dir = Path(cache_dir)
+        self.threshold = threshold
+        self._embedder = None
+        self._index = None
+        self._store = []
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self._index is not None
+
+    def load(self):
+        import faiss
+        from fastembed import TextEmbedding
+        
+        self._embedder = TextEmbedding(EMBEDDING_MODEL)
+        index_path = self.cache_dir / "index.faiss"
+        store_path = self.cache_dir / "store.json"
+        
+        if index_path.exists() and store_path.exists():
+            self._index = faiss.read_index(str(index_path))
+            self._store = orjson.loads(store_path.read_bytes())
+        else:
+            # Embedding once also warms up the ONNX session
+            dim = self._embed("warmup").shape[1]
+            self._index = faiss.IndexFlatIP(dim)
+            self._store = []
+        
+        logger.info("🧠 Semantic cache loaded with %s entries", len(self._store))
+
+    def save(self):
+        import faiss
+        
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            faiss.write_index(self._index, str(self.cache_dir / "index.faiss"))
+            (self.cache_dir / "store.json").write_bytes(orjson.dumps(self._store))
+        logger.info("🧠 Semantic cache saved with %s entries", len(self._store))
+
+    def _embed(self, text: str):
+        import numpy as np
+        
+        embedding = np.asarray(next(iter(self._embedder.embed([text]))), dtype="float32")
+        # Normalise so inner product equals cosine similarity
+        embedding /= np.linalg.norm(embedding) or 1.0
+        return embedding.reshape(1, -1)
+
+    def lookup(self, text: str):
+        """
+        Return (embedding, cached_value); cached_value is None on a miss.
+        The embedding is returned so a miss can be added without re-embedding.
+        """
+        embedding = self._embed(text)
+        with self._lock:
+            if self._index.ntotal == 0:
+                return embedding, None
+            scores, ids = self._index.search(embedding, 1)
+        if scores[0][0] > self.threshold:
+            return embedding, self._store[ids[0][0]]
+        return embedding, None
+
+    def add(self, embedding, value):
+        with self._lock:
+            self._index.add(embedding)
+            self._store.append(value)
+
+semantic_cache = SemanticCache(SEMANTIC_CACHE_DIR, SEMANTIC_CACHE_THRESHOLD)